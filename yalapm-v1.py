@@ -9,37 +9,96 @@ import threading
 import time
 import os
 import json
-import subprocess
+from array import array
 from collections import deque
-from datetime import datetime, timedelta
+from datetime import datetime
 
 try:
     from pynput import mouse, keyboard
 except ImportError:
-    print("❌ pynput not found. Installing...")
-    try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "pynput"])
-        from pynput import mouse, keyboard
-        print("✅ pynput installed successfully")
-    except:
-        print("❌ Failed to install pynput automatically.")
-        print("Please run one of these commands:")
-        print("  pip install pynput")
-        print("  pip3 install pynput")
-        print("  sudo apt install python3-pynput")
-        sys.exit(1)
+    sys.exit(
+        "❌ pynput not found.\n"
+        "Please run one of these commands:\n"
+        "  pip install pynput\n"
+        "  pip3 install pynput\n"
+        "  sudo apt install python3-pynput"
+    )
+
+
+# Power-of-two ring size so the head wraps with a bit mask
+ACTION_BUFFER_SIZE = 4096
+ACTION_BUFFER_MASK = ACTION_BUFFER_SIZE - 1
+
+APM_HISTORY_SIZE = 60
+
+_monotonic = time.monotonic
+
+# ANSI escapes used to redraw the screen without spawning `clear`
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+
+# Static frame pieces, only the numeric slots change between ticks
+FRAME_SEPARATOR = "╠══════════════════════════════════════════════════════════════╣"
+STATS_TEMPLATE = "\n".join([
+    "╔══════════════════════════════════════════════════════════════╗",
+    "║                    LINUX APM MONITOR                         ║",
+    FRAME_SEPARATOR,
+    "║  Current APM:     {current_apm:>6} {apm_icon}                                  ║",
+    "║  Peak APM:        {peak_apm:>6} 🏆                                  ║",
+    "║  Average APM:     {avg_apm:>6} 📊                                  ║",
+    "║  Average veAPM:   {virtual_eapm:>6} 🎮 (virtual {virtual_pct}%)                    ║",
+    "║  Total Actions:   {total_actions:>6,} 🎯                                  ║",
+    "║  Session Time:    {session_time:>8} ⏱️                                 ║",
+    "║  Status:          {status:>15}                           ║",
+])
+PERMISSION_WARNING = "\n".join([
+    FRAME_SEPARATOR,
+    "║  ⚠️  PERMISSION ISSUE DETECTED                              ║",
+    "║  Try running with sudo, or check accessibility settings     ║",
+])
+# Indexed by how many of the 0/50/100 APM thresholds are exceeded
+APM_ICONS = ('💤', '📈', '⚡', '🔥')
+GRAPH_CHARS = (' ', '▁', '▂', '▃', '▄', '▅', '▆', '▇', '█')
+GRAPH_TITLE = "║  APM Trend (last 30s):                                       ║"
+GRAPH_EMPTY = "║  " + "─" * 56 + "    ║"
+FRAME_FOOTER = "\n".join([
+    FRAME_SEPARATOR,
+    "║  Press Ctrl+C to stop monitoring and see final report        ║",
+    "╚══════════════════════════════════════════════════════════════╝",
+])
+TROUBLESHOOTING = "\n".join([
+    "\n🔧 TROUBLESHOOTING:",
+    "1. Try running with: sudo python3 apm_monitor.py",
+    "2. Ubuntu: Install 'python3-pynput' package",
+    "3. Some systems need X11 forwarding or different permissions",
+])
+
+
+def format_duration(seconds):
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
 class RobustAPMMonitor:
     def __init__(self):
-        self.monitoring_start = None  # Track when monitoring actually starts
+        self._monitoring_start_mono = None  # Track when monitoring actually starts
         self.virtual_eapm = 0.7  # 70% virtual efficiency
-        self.actions = deque(maxlen=3600)
-        self.session_start = datetime.now()
+        # Ring buffer of monotonic action timestamps (seconds)
+        self._ts_buf = array('d', [0.0] * ACTION_BUFFER_SIZE)
+        self._head = 0
+        self._count = 0
+        # Listener threads hand timestamps over here; the display tick drains them
+        self._pending = deque()
+        self._session_start_mono = _monotonic()
         self.is_monitoring = False
         self.total_actions = 0
         self.peak_apm = 0
-        self.apm_history = deque(maxlen=60)
+        # Ring buffer of per-second APM samples
+        self._apm_hist = array('H', [0] * APM_HISTORY_SIZE)
+        self._apm_hist_head = 0
+        self._apm_hist_len = 0
         
         # Listeners
         self.mouse_listener = None
@@ -53,43 +112,84 @@ class RobustAPMMonitor:
         self.running = True
         self.display_thread = None
         
+    # Listeners only exist while monitoring (stop_monitoring stops them),
+    # so the callbacks don't need to re-check is_monitoring per event.
     def on_mouse_click(self, x, y, button, pressed):
-        if pressed and self.is_monitoring:
+        if pressed:
             self.record_action()
             
-    def on_key_press(self, key):
-        if self.is_monitoring:
-            self.record_action()
-            
-    def record_action(self):
-        now = datetime.now()
-        self.actions.append(now)
-        self.total_actions += 1
+    def record_action(self, *_):
+        # deque.append is atomic, so the mouse and keyboard threads never
+        # touch the shared ring buffer or counters directly
+        self._pending.append(_monotonic())
+
+    # Every key press counts, so the keyboard listener calls straight into
+    # record_action without an intermediate frame
+    on_key_press = record_action
         
-    def calculate_current_apm(self):
-        now = datetime.now()
-        one_minute_ago = now - timedelta(minutes=1)
-        recent_actions = [action for action in self.actions if action > one_minute_ago]
-        return len(recent_actions)
+    def _drain_pending(self):
+        """Move queued action timestamps into the ring buffer in one batch"""
+        pending = self._pending
+        buf = self._ts_buf
+        head = self._head
+        drained = 0
+        while pending:
+            buf[head] = pending.popleft()
+            head = (head + 1) & ACTION_BUFFER_MASK
+            drained += 1
+        self._head = head
+        self._count += drained
+        self.total_actions += drained
+
+    def calculate_current_apm(self, now=None):
+        """Count actions in the last minute, walking back from the newest"""
+        self._drain_pending()
+        if now is None:
+            now = _monotonic()
+        buf = self._ts_buf
+        idx = self._head
+        apm = 0
+        for _ in range(min(self._count, ACTION_BUFFER_SIZE)):
+            idx = (idx - 1) & ACTION_BUFFER_MASK
+            if now - buf[idx] > 60.0:
+                break
+            apm += 1
+        return apm
+        
+    def _push_history(self, apm):
+        self._apm_hist[self._apm_hist_head] = min(apm, 0xFFFF)
+        self._apm_hist_head = (self._apm_hist_head + 1) % APM_HISTORY_SIZE
+        if self._apm_hist_len < APM_HISTORY_SIZE:
+            self._apm_hist_len += 1
+
+    def recent_history(self, n):
+        """Return up to the last n APM samples, oldest first"""
+        hist, head = self._apm_hist, self._apm_hist_head
+        start = head - min(n, self._apm_hist_len)
+        if start >= 0:
+            return hist[start:head]
+        # Window wraps around the end of the ring
+        return hist[start:] + hist[:head]
         
-    def calculate_average_apm(self):
-        if not self.actions:
+    def calculate_average_apm(self, now=None):
+        if not self.total_actions:
             return 0
-        session_duration = (datetime.now() - self.session_start).total_seconds() / 60
+        if now is None:
+            now = _monotonic()
+        session_duration = (now - self._session_start_mono) / 60
         if session_duration > 0:
             return int(self.total_actions / session_duration)
         return 0
         
-    def get_session_time(self):
-        if self.monitoring_start is None:
+    def get_session_time(self, now=None):
+        if self._monitoring_start_mono is None:
             return "00:00:00"
         
         # Calculate total monitoring time
         if self.is_monitoring:
-            session_duration = datetime.now() - self.monitoring_start
-            hours, remainder = divmod(int(session_duration.total_seconds()), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            self._last_session_time = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+            if now is None:
+                now = _monotonic()
+            self._last_session_time = format_duration(now - self._monitoring_start_mono)
             return self._last_session_time
         else:
             # When stopped, return the last calculated time (frozen)
@@ -112,7 +212,7 @@ class RobustAPMMonitor:
             time.sleep(0.1)
             if self.mouse_listener.running and self.keyboard_listener.running:
                 self.is_monitoring = True
-                self.monitoring_start = datetime.now()
+                self._monitoring_start_mono = _monotonic()
                 self.listener_error = None
                 return True
             else:
@@ -128,12 +228,9 @@ class RobustAPMMonitor:
             return False
         
     def stop_monitoring(self):
-        if self.is_monitoring and self.monitoring_start:
+        if self.is_monitoring and self._monitoring_start_mono is not None:
             # Save final session time before stopping
-            session_duration = datetime.now() - self.monitoring_start
-            hours, remainder = divmod(int(session_duration.total_seconds()), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            self._last_session_time = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+            self._last_session_time = format_duration(_monotonic() - self._monitoring_start_mono)
         
         self.is_monitoring = False
         try:
@@ -143,61 +240,52 @@ class RobustAPMMonitor:
                 self.keyboard_listener.stop()
         except:
             pass
+        self._drain_pending()
         
     def reset_stats(self):
-        self.actions.clear()
-        self.apm_history.clear() 
+        self._pending.clear()
+        self._head = 0
+        self._count = 0
+        self._apm_hist_head = 0
+        self._apm_hist_len = 0
         self.total_actions = 0
         self.peak_apm = 0
-        self.session_start = datetime.now()
+        self._session_start_mono = _monotonic()
         
     def save_stats(self):
+        now = _monotonic()
         stats = {
             'total_actions': self.total_actions,
             'peak_apm': self.peak_apm,
-            'avg_apm': self.calculate_average_apm(),
-            'session_duration': (datetime.now() - self.session_start).total_seconds(),
+            'avg_apm': self.calculate_average_apm(now),
+            'session_duration': now - self._session_start_mono,
             'timestamp': datetime.now().isoformat()
         }
         
         try:
+            data = json.dumps(stats, indent=2)
             with open(self.stats_file, 'w') as f:
-                json.dump(stats, f, indent=2)
+                f.write(data)
             return True
         except Exception as e:
             return False
             
     def display_stats(self):
-        # current_apm = self.calculate_current_apm()
+        # One timestamp per frame so all figures describe the same instant
+        now = _monotonic()
         if self.is_monitoring:
-            current_apm = self.calculate_current_apm()
+            current_apm = self.calculate_current_apm(now)
             if current_apm > self.peak_apm:
                 self.peak_apm = current_apm
-            self.apm_history.append(current_apm)
+            self._push_history(current_apm)
         else:
             # When stopped, show last known APM but don't update it
-            current_apm = self.apm_history[-1] if self.apm_history else 0
+            current_apm = self._apm_hist[self._apm_hist_head - 1] if self._apm_hist_len else 0
 
-        avg_apm = self.calculate_average_apm()
+        avg_apm = self.calculate_average_apm(now)
         
-        if current_apm > self.peak_apm:
-            self.peak_apm = current_apm
-            
-        self.apm_history.append(current_apm)
-        
-        # Clear screen
-        os.system('clear' if os.name == 'posix' else 'cls')
-        
-        print("╔══════════════════════════════════════════════════════════════╗")
-        print("║                    LINUX APM MONITOR                         ║") 
-        print("╠══════════════════════════════════════════════════════════════╣")
-        print(f"║  Current APM:     {current_apm:>6} {'🔥' if current_apm > 100 else '⚡' if current_apm > 50 else '📈' if current_apm > 0 else '💤'}                                  ║")
-        print(f"║  Peak APM:        {self.peak_apm:>6} 🏆                                  ║")
-        print(f"║  Average APM:     {avg_apm:>6} 📊                                  ║")
+        # Build the whole frame and write it out in one go
         virtual_eapm = int(avg_apm * self.virtual_eapm)
-        print(f"║  Average veAPM:   {virtual_eapm:>6} 🎮 (virtual {int(self.virtual_eapm*100)}%)                    ║")
-        print(f"║  Total Actions:   {self.total_actions:>6,} 🎯                                  ║")
-        print(f"║  Session Time:    {self.get_session_time():>8} ⏱️                                 ║")
         
         # Status with error info
         if self.is_monitoring:
@@ -206,40 +294,43 @@ class RobustAPMMonitor:
             status = "PERMISSION ERROR 🔴"
         else:
             status = "STOPPED 🔴"
-        print(f"║  Status:          {status:>15}                           ║")
+        
+        lines = [STATS_TEMPLATE.format(
+            current_apm=current_apm,
+            apm_icon=APM_ICONS[(current_apm > 0) + (current_apm > 50) + (current_apm > 100)],
+            peak_apm=self.peak_apm,
+            avg_apm=avg_apm,
+            virtual_eapm=virtual_eapm,
+            virtual_pct=int(self.virtual_eapm*100),
+            total_actions=self.total_actions,
+            session_time=self.get_session_time(now),
+            status=status,
+        )]
         
         if self.listener_error:
-            print("╠══════════════════════════════════════════════════════════════╣")
-            print("║  ⚠️  PERMISSION ISSUE DETECTED                              ║")
-            print("║  Try running with sudo, or check accessibility settings     ║")
+            lines.append(PERMISSION_WARNING)
         
-        print("╠══════════════════════════════════════════════════════════════╣")
+        lines.append(FRAME_SEPARATOR)
         
         # Simple ASCII graph
-        if len(self.apm_history) > 0:
-            print("║  APM Trend (last 30s):                                       ║")
-            recent = list(self.apm_history)[-30:]
+        if self._apm_hist_len:
+            lines.append(GRAPH_TITLE)
+            recent = self.recent_history(30)
             if recent and max(recent) > 0:
-                max_apm = max(recent)
-                graph_line = "║  "
-                for apm in recent:
-                    height = int((apm / max_apm) * 8) if max_apm > 0 else 0
-                    chars = [' ', '▁', '▂', '▃', '▄', '▅', '▆', '▇', '█']
-                    graph_line += chars[height]
+                scale = 8.0 / max(recent)
+                graph_line = "║  " + "".join([GRAPH_CHARS[int(apm * scale)] for apm in recent])
                 graph_line += " " * (60 - len(graph_line)) + "   ║"
-                print(graph_line)
+                lines.append(graph_line)
             else:
-                print("║  " + "─" * 56 + "    ║")
+                lines.append(GRAPH_EMPTY)
                 
-        print("╠══════════════════════════════════════════════════════════════╣")
-        print("║  Press Ctrl+C to stop monitoring and see final report        ║")
-        print("╚══════════════════════════════════════════════════════════════╝")
+        lines.append(FRAME_FOOTER)
         
         if self.listener_error:
-            print("\n🔧 TROUBLESHOOTING:")
-            print("1. Try running with: sudo python3 apm_monitor.py")
-            print("2. Ubuntu: Install 'python3-pynput' package")
-            print("3. Some systems need X11 forwarding or different permissions")
+            lines.append(TROUBLESHOOTING)
+
+        sys.stdout.write(CLEAR_SCREEN + "\n".join(lines) + "\n")
+        sys.stdout.flush()
             
     def run_simple_ui(self):
         """Auto-start monitoring, quit with Ctrl+C"""
@@ -259,10 +350,23 @@ class RobustAPMMonitor:
         print()
         
         try:
-            # Simple display loop
-            while self.running:
-                self.display_stats()
-                time.sleep(1)
+            # Simple display loop, cursor hidden to avoid flicker on redraw
+            sys.stdout.write(HIDE_CURSOR)
+            try:
+                # Sleep to absolute deadlines so render time doesn't add drift
+                next_tick = _monotonic()
+                while self.running:
+                    self.display_stats()
+                    next_tick += 1.0
+                    delay = next_tick - _monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        # Overran a tick: skip ahead instead of bursting to catch up
+                        next_tick = _monotonic()
+            finally:
+                sys.stdout.write(SHOW_CURSOR)
+                sys.stdout.flush()
                 
         except KeyboardInterrupt:
             print("\n\n🛑 Stopping monitor...")
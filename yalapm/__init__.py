@@ -8,30 +8,29 @@ import threading
 import time
 import os
 import json
+import gzip
+import zlib
+import re
 import subprocess
 import webbrowser
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from array import array
 from collections import deque, defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 
 # --- Dependency Management ---
 
-def install_package(package_name):
-    print(f"❌ {package_name} not found. Attempting to install...")
-    try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package_name])
-        print(f"✅ {package_name} installed successfully.")
-        return True
-    except Exception as e:
-        print(f"❌ Failed to install {package_name} automatically: {e}")
-        print(f"   Please run: pip install {package_name}")
-        return False
+def missing_package(package_name):
+    sys.exit(f"❌ {package_name} not found.\n   Please run: pip install {package_name}")
 
 try:
     from pynput import mouse, keyboard
 except ImportError:
-    if not install_package("pynput"): sys.exit(1)
-    from pynput import mouse, keyboard
+    missing_package("pynput")
 
 try:
     from textual.app import App, ComposeResult
@@ -40,295 +39,489 @@ try:
     from textual.screen import ModalScreen
     from textual.reactive import reactive
 except ImportError:
-    if not install_package("textual"): sys.exit(1)
-    from textual.app import App, ComposeResult
-    from textual.widgets import Header, Footer, Static, Input, Button, Label, ListView, ListItem
-    from textual.containers import Container, Vertical, Horizontal
-    from textual.screen import ModalScreen
-    from textual.reactive import reactive
+    missing_package("textual")
+
+try:
+    import orjson  # Optional, faster report serialization
+except ImportError:
+    orjson = None
 
 
 # --- Monitoring Engine ---
 
+# Clock functions bound once so hot paths skip the module attribute lookup
+_monotonic = time.monotonic
+_wall_now = datetime.now
+APM_HISTORY_SIZE = 300  # 5 minutes of 1 Hz samples
+APM_WINDOW_SECONDS = 60
+JSON_SEPARATORS = (',', ':')
+STATE_STOPPED, STATE_PAUSED, STATE_RUNNING = 0, 1, 2
+
+# Dashboard page. The __NAME__ markers are split out once at import, so
+# generate_html_report only joins the static pieces with the dynamic parts.
+_HTML_TEMPLATE = """
+        <!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>YALAPM Reports</title>
+            <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+            <style>
+                body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif; margin: 2em; background: #f4f4f9; color: #333; }
+                h1, h2, h3 { color: #444; }
+                .container { display: flex; flex-wrap: wrap; gap: 2em; }
+                .reports-list { flex: 1; min-width: 350px; }
+                .chart-container { flex: 2; min-width: 400px; background: #fff; padding: 1em; border-radius: 8px; box-shadow: 0 0 10px rgba(0,0,0,0.1); }
+                ul { list-style-type: none; padding: 0; } li { margin-bottom: 0.5em; padding: 0.5em; background: #fff; border-radius: 4px; }
+                a { text-decoration: none; color: #007bff; } a:hover { text-decoration: underline; }
+                .tag-group { margin-bottom: 1.5em; border: 1px solid #ddd; padding: 1em; border-radius: 8px; background: #fafafa; }
+                .chart-controls { margin-bottom: 1em; }
+                .chart-controls label { font-weight: bold; margin-right: 10px; }
+                .chart-controls select { padding: 5px; border-radius: 4px; border: 1px solid #ccc; }
+            </style>
+        </head><body>
+            <h1>YALAPM Session Reports Dashboard</h1>
+            <div class="container">
+                <div class="reports-list">
+                    <h2>Saved Sessions</h2>
+                    __TAG_SECTIONS__
+                </div>
+                <div class="chart-container">
+                    <div class="chart-controls">
+                        <label for="tagFilter">Filter Chart by Tag:</label>
+                        <select id="tagFilter">
+                            __FILTER_OPTIONS__
+                        </select>
+                    </div>
+                    <h2>Historical APM Performance</h2><canvas id="apmChart"></canvas>
+                </div>
+            </div>
+            <script>
+                // Chart series come pre-sorted by date: {labels, avg, ve} per tag
+                const chartByTag = __CHART_BY_TAG__;
+                const chartAll = __CHART_ALL__;
+                let apmChart;
+
+                function updateChart(selectedTag) {
+                    const series = selectedTag === 'all' ? chartAll : (chartByTag[selectedTag] || { labels: [], avg: [], ve: [] });
+                    apmChart.data.labels = series.labels;
+                    apmChart.data.datasets[0].data = series.avg;
+                    apmChart.data.datasets[1].data = series.ve;
+                    apmChart.update();
+                }
+
+                document.addEventListener('DOMContentLoaded', () => {
+                    const ctx = document.getElementById('apmChart').getContext('2d');
+                    apmChart = new Chart(ctx, {
+                        type: 'line', 
+                        data: { 
+                            labels: [], // Initially empty
+                            datasets: [
+                                { label: 'Average APM', data: [], borderColor: 'rgba(75, 192, 192, 1)', tension: 0.1 },
+                                { label: 'Average veAPM', data: [], borderColor: 'rgba(255, 99, 132, 1)', tension: 0.1 } 
+                            ]
+                        },
+                        options: { 
+                            responsive: true, 
+                            scales: { 
+                                x: { title: { display: true, text: 'Report Date' } }, 
+                                y: { title: { display: true, text: 'APM' } } 
+                            } 
+                        }
+                    });
+
+                    // Initial chart load
+                    updateChart('all');
+
+                    // Add event listener for the filter
+                    document.getElementById('tagFilter').addEventListener('change', (event) => {
+                        updateChart(event.target.value);
+                    });
+                });
+            </script>
+        </body></html>"""
+_HTML_PARTS = re.split(r"__(TAG_SECTIONS|FILTER_OPTIONS|CHART_BY_TAG|CHART_ALL)__", _HTML_TEMPLATE)
+_OPTION_FMT = '<option value="%s">%s</option>'
+_LI_FMT = '<li><a href="%s">%s</a> - Avg APM: %s</li>'
+_TAG_FMT = """
+            <div class="tag-group">
+                <h3>Tag: %s</h3>
+                <ul>%s</ul>
+            </div>"""
+
+def format_session_time(seconds: int) -> str:
+    hours, rem = divmod(seconds, 3600)
+    mins, secs = divmod(rem, 60)
+    return f"{hours:02d}:{mins:02d}:{secs:02d}"
+
 class APMMonitorEngine:
     """Handles the backend logic for monitoring APM."""
+    _STATUS_STR = ("STOPPED 🔴", "PAUSED 🟡", "RUNNING 🟢")  # Indexed by state
+    _ensured_dirs: set[Path] = set()  # Report folders already created by this process
+
     def __init__(self):
         self.virtual_eapm_factor = 0.7
-        self.actions = deque()
-        self.session_start = datetime.now()
-        self.apm_history = deque(maxlen=300)
+        # [second, count] buckets of recent actions, keyed by int(time.monotonic()).
+        # maxlen caps memory at one entry per second of the window regardless of APM.
+        self.action_buckets = deque(maxlen=APM_WINDOW_SECONDS)
+        # Listener threads only append monotonic timestamps here (atomic under the GIL);
+        # the UI tick drains them into action_buckets and total_actions
+        self._pending = deque()
+        self.session_start = _wall_now()
+        # Ring buffer of per-second APM samples; see get_history for ordered access
+        self.apm_history = array('i', [0] * APM_HISTORY_SIZE)
+        self._hist_head = 0
+        self._hist_len = 0
+        self._history_snapshot = None
         self.mouse_listener = None
         self.keyboard_listener = None
         self.reports_dir = Path.home() / "Documents" / "YALAPM_Reports"
-        self.reports_dir.mkdir(parents=True, exist_ok=True)
-        self.state = "STOPPED"
-        self.total_active_duration = timedelta(0)
+        if self.reports_dir not in APMMonitorEngine._ensured_dirs:
+            self.reports_dir.mkdir(parents=True, exist_ok=True)
+            APMMonitorEngine._ensured_dirs.add(self.reports_dir)
+        self.state = STATE_STOPPED
+        self._recording = False  # Mirrors state == STATE_RUNNING for the listener threads
+        self.on_state_change = None  # Called with the new state after start/pause/resume/stop
+        self.active_seconds = 0.0  # Time spent RUNNING, accumulated on the monotonic clock
         self.last_tick_time = None
         self.session_tag = "untagged"
+        self._all_reports = None  # Parsed report JSONs, loaded from disk on first use
+        self._reports_mtime = None  # reports_dir mtime the cache was loaded against
+        self._reports_by_tag = None
+        self._date_labels = {}  # filename -> display datetime, parsed once per report
+        self._html_dirty = False  # Reports were deleted since index.html was last written
+        self._html_signature = None  # Report filenames index.html was last written from
         self.reset_metrics()
 
     def reset_metrics(self):
-        self.actions.clear()
-        self.apm_history.clear()
+        self.action_buckets.clear()
+        self._window_actions = 0  # Running sum of the bucket counts
+        self._pending.clear()
+        self._hist_head = 0
+        self._hist_len = 0
+        self._history_snapshot = None
         self.total_actions = 0
         self.peak_apm = 0
-        self.session_start = datetime.now()
-        self.total_active_duration = timedelta(0)
+        self.session_start = _wall_now()
+        self.active_seconds = 0.0
         self.last_tick_time = None
-
-    def on_mouse_click(self, x, y, button, pressed):
-        if pressed and self.state == "RUNNING": self.record_action()
-
-    def on_key_press(self, key):
-        if self.state == "RUNNING": self.record_action()
-
-    def record_action(self):
-        self.actions.append(datetime.now())
-        self.total_actions += 1
-
-    def get_stats(self):
-        now = datetime.now()
-        if self.state == "RUNNING":
-            if self.last_tick_time:
-                self.total_active_duration += now - self.last_tick_time
+        self._idle_stats = None
+
+    def _drain_pending(self):
+        # Count into one-second buckets so the window stays at most
+        # APM_WINDOW_SECONDS entries long no matter how fast actions arrive
+        pending, buckets = self._pending, self.action_buckets
+        popleft = pending.popleft
+        # One drainer at a time: the UI tick, or stop() after quit has stopped the tick.
+        # Items appended meanwhile wait for the next drain
+        n = len(pending)
+        for _ in range(n):
+            sec = int(popleft())
+            if buckets and buckets[-1][0] == sec: buckets[-1][1] += 1
+            else:
+                # A full deque evicts its oldest bucket on append; keep the sum in step
+                if len(buckets) == APM_WINDOW_SECONDS: self._window_actions -= buckets[0][1]
+                buckets.append([sec, 1])
+        self.total_actions += n
+        self._window_actions += n
+        self._idle_stats = None
+
+    def get_counters(self):
+        """Advance the session clock and return the live figures, without the history copy."""
+        if self._pending: self._drain_pending()
+        # Paused or stopped with an empty window: only the status can change
+        # until the engine runs again
+        stats = self._idle_stats
+        if stats is not None and self.state != STATE_RUNNING:
+            # A fresh dict each tick, so callers can keep or extend the previous one
+            return {**stats, "status": self._STATUS_STR[self.state]}
+        now = _monotonic()
+        if self.state == STATE_RUNNING:
+            if self.last_tick_time is not None:
+                self.active_seconds += now - self.last_tick_time
             self.last_tick_time = now
 
-        one_minute_ago = now - timedelta(minutes=1)
-        while self.actions and self.actions[0] < one_minute_ago:
-            self.actions.popleft()
-        current_apm = len(self.actions)
+        buckets = self.action_buckets
+        oldest = int(now) - APM_WINDOW_SECONDS + 1
+        while buckets and buckets[0][0] < oldest: self._window_actions -= buckets.popleft()[1]
+        current_apm = self._window_actions
 
-        if self.state == "RUNNING":
+        if self.state == STATE_RUNNING:
             if current_apm > self.peak_apm:
                 self.peak_apm = current_apm
-            self.apm_history.append(current_apm)
-        
-        session_duration_min = self.total_active_duration.total_seconds() / 60
-        avg_apm = int(self.total_actions / session_duration_min) if session_duration_min > 0 else 0
+            self.apm_history[self._hist_head] = current_apm
+            self._hist_head = (self._hist_head + 1) % APM_HISTORY_SIZE
+            if self._hist_len < APM_HISTORY_SIZE: self._hist_len += 1
+            self._history_snapshot = None
         
-        hours, rem = divmod(int(self.total_active_duration.total_seconds()), 3600)
-        mins, secs = divmod(rem, 60)
-        session_time = f"{hours:02d}:{mins:02d}:{secs:02d}"
-
-        return {
+        avg_apm = self.average_apm()
+        stats = {
             "current_apm": current_apm,
             "peak_apm": self.peak_apm,
             "average_apm": avg_apm,
             "average_veapm": int(avg_apm * self.virtual_eapm_factor),
             "total_actions": self.total_actions,
-            "session_time": session_time,
-            "status": f"{self.state} {'🟢' if self.state == 'RUNNING' else '🟡' if self.state == 'PAUSED' else '🔴'}",
-            "apm_history": list(self.apm_history)
+            "session_time": format_session_time(int(self.active_seconds)),
+            "status": self._STATUS_STR[self.state],
         }
+        self._idle_stats = stats.copy() if self.state != STATE_RUNNING and not buckets else None
+        return stats
+
+    def average_apm(self):
+        session_duration_min = self.active_seconds / 60
+        return int(self.total_actions / session_duration_min) if session_duration_min > 0 else 0
+
+    def get_history(self):
+        """Return the APM samples oldest first. The array is shared until the next sample; don't mutate it."""
+        if self._history_snapshot is None:
+            head = self._hist_head
+            if self._hist_len < APM_HISTORY_SIZE: self._history_snapshot = self.apm_history[:head]
+            else: self._history_snapshot = self.apm_history[head:] + self.apm_history[:head]
+        return self._history_snapshot
+
+    def get_stats(self):
+        stats = self.get_counters()
+        stats["apm_history"] = self.get_history()
+        return stats
+
+    def start_listeners(self):
+        """Start the input listeners once for the app's lifetime; _recording gates what they count."""
+        if self.mouse_listener: return True
+        # The per-event work on the listener threads is a single deque append
+        # of a timestamp, through names bound once here
+        append = self._pending.append
+        def on_click(x, y, button, pressed):
+            if pressed and self._recording: append(_monotonic())
+        def on_press(key):
+            if self._recording: append(_monotonic())
+        try:
+            # pynput listeners are daemon threads, so they never block interpreter exit
+            self.mouse_listener = mouse.Listener(on_click=on_click)
+            self.keyboard_listener = keyboard.Listener(on_press=on_press)
+            self.mouse_listener.start()
+            self.keyboard_listener.start()
+            return True
+        except Exception:
+            self.stop_listeners()
+            return False
+
+    def stop_listeners(self):
+        if self.mouse_listener: self.mouse_listener.stop()
+        if self.keyboard_listener: self.keyboard_listener.stop()
+        self.mouse_listener = self.keyboard_listener = None
 
     def start(self, tag: str, veapm: float):
-        if self.state != "STOPPED": return
+        if self.state != STATE_STOPPED: return
+        if not self.start_listeners(): return
         self.reset_metrics()
         self.session_tag = tag
         self.virtual_eapm_factor = veapm
-        try:
-            self.mouse_listener = mouse.Listener(on_click=self.on_mouse_click)
-            self.keyboard_listener = keyboard.Listener(on_press=self.on_key_press)
-            self.mouse_listener.start()
-            self.keyboard_listener.start()
-            self.state = "RUNNING"
-            self.last_tick_time = datetime.now()
-        except Exception as e:
-            self.state = "STOPPED"
+        self.last_tick_time = _monotonic()
+        self._set_state(STATE_RUNNING)
 
     def pause(self):
-        if self.state == "RUNNING":
-            self.state = "PAUSED"
+        if self.state == STATE_RUNNING:
             self.last_tick_time = None
+            self._set_state(STATE_PAUSED)
 
     def resume(self):
-        if self.state == "PAUSED":
-            self.state = "RUNNING"
-            self.last_tick_time = datetime.now()
+        if self.state == STATE_PAUSED:
+            self.last_tick_time = _monotonic()
+            self._set_state(STATE_RUNNING)
 
     def reset_and_start(self, tag: str, veapm: float):
-        if self.state != "STOPPED": self.stop()
+        if self.state != STATE_STOPPED: self.stop()
         self.start(tag, veapm)
 
     def stop(self):
-        if self.state == "STOPPED": return None
-        self.state = "STOPPED"
+        if self.state == STATE_STOPPED: return None
         self.last_tick_time = None
-        if self.mouse_listener: self.mouse_listener.stop()
-        if self.keyboard_listener: self.keyboard_listener.stop()
+        self._set_state(STATE_STOPPED)
+        self._drain_pending()
         return self.save_session()
 
+    def _set_state(self, state: int):
+        self.state = state
+        self._recording = state == STATE_RUNNING
+        if self.on_state_change: self.on_state_change(state)
+
+    @staticmethod
+    def _open_with_desktop(path: Path):
+        if sys.platform == "win32": os.startfile(path)
+        else:
+            # Fire and forget: the file manager or browser can take a while to come up
+            opener = "open" if sys.platform == "darwin" else "xdg-open"
+            try:
+                subprocess.Popen([opener, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+            except FileNotFoundError:
+                webbrowser.open_new_tab(path.as_uri())
+
     def open_report_folder(self):
-        if sys.platform == "win32": os.startfile(self.reports_dir)
-        elif sys.platform == "darwin": subprocess.run(["open", self.reports_dir])
-        else: subprocess.run(["xdg-open", self.reports_dir])
+        self._open_with_desktop(self.reports_dir)
+
+    def open_report(self):
+        self._open_with_desktop(self.get_report_path())
 
     def get_report_path(self):
         return self.reports_dir / "index.html"
 
     def save_session(self):
         if self.total_actions == 0: return self.generate_html_report()
-        stats = self.get_stats()
+        # Only the counters are needed here, not a full get_stats tick
+        avg_apm = self.average_apm()
+        now = _wall_now()
         final_stats = {
             'tag': self.session_tag,
             'virtual_eapm_factor': self.virtual_eapm_factor,
-            'total_actions': stats['total_actions'],
-            'peak_apm': stats['peak_apm'],
-            'average_apm': stats['average_apm'],
-            'average_veapm': stats['average_veapm'],
-            'session_duration_seconds': self.total_active_duration.total_seconds(),
-            'report_datetime': datetime.now().isoformat()
+            'total_actions': self.total_actions,
+            'peak_apm': self.peak_apm,
+            'average_apm': avg_apm,
+            'average_veapm': int(avg_apm * self.virtual_eapm_factor),
+            'session_duration_seconds': self.active_seconds,
+            'report_datetime': now.isoformat()
         }
         
-        filename = f"report_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+        filename = f"report_{now.strftime('%Y-%m-%d_%H-%M-%S')}.json.gz"
         filepath = self.reports_dir / filename
-        with open(filepath, 'w') as f: json.dump(final_stats, f, indent=2)
+        # Compact JSON, encoded and gzipped up front and written in one call;
+        # the fastest level already shrinks these small files several times over
+        payload = orjson.dumps(final_stats) if orjson else json.dumps(final_stats, separators=JSON_SEPARATORS).encode()
+        # Filenames have one-second resolution, so a quick reset can overwrite the previous report
+        overwritten = filepath.exists()
+        with open(filepath, 'wb') as f: f.write(gzip.compress(payload, compresslevel=1))
+        if overwritten:
+            self._date_labels.pop(filename, None)
+            self._html_signature = None  # Same filenames, different content
+        if self._all_reports is not None:
+            if overwritten: self._all_reports = [r for r in self._all_reports if r['filename'] != filename]
+            self._all_reports.append({**final_stats, 'filename': filename})
+        self._reports_changed()
         return self.generate_html_report()
 
+    @staticmethod
+    def _read_report(file):
+        try:
+            with open(file, 'rb') as f:
+                raw = f.read()
+            # Reports saved before compression was introduced are plain .json
+            data = json.loads(gzip.decompress(raw) if file.suffix == '.gz' else raw)
+        except (json.JSONDecodeError, UnicodeDecodeError, IOError, EOFError, zlib.error):
+            return None
+        data['filename'] = file.name
+        return data
+
+    def _reports_dir_mtime(self):
+        try:
+            return self.reports_dir.stat().st_mtime_ns
+        except FileNotFoundError:  # Folder removed while running; it just has no reports
+            return None
+
+    def _load_reports(self):
+        # Rescan only on first use or when something outside the engine touched the folder
+        mtime = self._reports_dir_mtime()
+        if self._all_reports is None or mtime != self._reports_mtime:
+            report_files = sorted([*self.reports_dir.glob('*.json'), *self.reports_dir.glob('*.json.gz')])
+            # Report files are independent, so read them concurrently
+            with ThreadPoolExecutor() as pool:
+                self._all_reports = [data for data in pool.map(self._read_report, report_files) if data is not None]
+            self._reports_mtime = mtime
+            self._reports_by_tag = None
+        return self._all_reports
+
+    def _reports_changed(self):
+        """Note the engine's own edits to the reports folder so they don't trigger a rescan."""
+        self._reports_by_tag = None
+        self._reports_mtime = self._reports_dir_mtime()
+
     def get_all_reports(self):
-        reports_by_tag = defaultdict(list)
-        report_files = sorted(self.reports_dir.glob('*.json'))
-        for file in report_files:
-            try:
-                with open(file, 'r') as f:
-                    data = json.load(f)
-                    data['filename'] = file.name
-                    tag = data.get('tag', 'untagged')
-                    reports_by_tag[tag].append(data)
-            except (json.JSONDecodeError, IOError):
-                continue
-        return reports_by_tag
+        """Reports grouped by tag. The dict is cached and shared; don't mutate it."""
+        reports = self._load_reports()
+        if self._reports_by_tag is None:
+            reports_by_tag = defaultdict(list)
+            for data in reports:
+                reports_by_tag[data.get('tag', 'untagged')].append(data)
+            self._reports_by_tag = dict(reports_by_tag)
+        return self._reports_by_tag
+
+    def report_date_label(self, report):
+        """The report's datetime as shown in the HTML list and report manager, parsed once per file."""
+        filename = report['filename']
+        label = self._date_labels.get(filename)
+        if label is None:
+            label = self._date_labels[filename] = datetime.fromisoformat(report['report_datetime']).strftime('%Y-%m-%d %H:%M')
+        return label
 
     def delete_report(self, filename: str):
         report_path = self.reports_dir / filename
-        if report_path.exists() and report_path.is_file():
+        try:
             report_path.unlink()
-            self.generate_html_report()
-            return True
-        return False
+        except OSError:  # Already gone, or not a report file (e.g. the folder itself)
+            return False
+        self._date_labels.pop(filename, None)
+        if self._all_reports is not None:
+            self._all_reports = [r for r in self._all_reports if r['filename'] != filename]
+        self._reports_changed()
+        self._html_dirty = True
+        return True
 
     def delete_tag(self, tag: str):
         reports_by_tag = self.get_all_reports()
-        if tag in reports_by_tag:
-            for report in reports_by_tag[tag]:
-                report_path = self.reports_dir / report['filename']
-                if report_path.exists():
-                    report_path.unlink()
-            self.generate_html_report()
-            return True
-        return False
+        if tag not in reports_by_tag: return False
+        for report in reports_by_tag[tag]:
+            try:
+                (self.reports_dir / report['filename']).unlink()
+            except FileNotFoundError:
+                pass
+            self._date_labels.pop(report['filename'], None)
+        self._all_reports = [r for r in self._all_reports if r.get('tag', 'untagged') != tag]
+        self._reports_changed()
+        # Dropping a whole tag leaves the other groups as they were, so cache
+        # them directly rather than regrouping
+        self._reports_by_tag = {t: reports for t, reports in reports_by_tag.items() if t != tag}
+        self._html_dirty = True
+        return True
+
+    def flush_html(self):
+        """Regenerate index.html if reports were deleted since it was last written."""
+        if self._html_dirty: self.generate_html_report()
 
     def generate_html_report(self):
         reports_by_tag = self.get_all_reports()
-        all_data = [report for reports in reports_by_tag.values() for report in reports]
+        html_path = self.reports_dir / "index.html"
+        # The page is fully determined by the set of reports; skip the rewrite if it hasn't changed
+        signature = tuple(r['filename'] for reports in reports_by_tag.values() for r in reports)
+        if signature == self._html_signature and html_path.exists():
+            self._html_dirty = False
+            return html_path
+        label = self.report_date_label
+
+        def chart_series(reports):
+            # ISO timestamps sort chronologically as strings
+            reports = sorted(reports, key=itemgetter('report_datetime'))
+            return {
+                "labels": [label(r) for r in reports],
+                "avg": [r['average_apm'] for r in reports],
+                "ve": [r['average_veapm'] for r in reports],
+            }
 
         # Dynamically create filter options for the dropdown
         filter_options = ['<option value="all">All Tags</option>']
-        for tag in sorted(reports_by_tag.keys()):
-            filter_options.append(f'<option value="{tag}">{tag}</option>')
-
-        def render_tag_section(tag, reports):
-            items = []
-            for r in reports:
-                dt = datetime.fromisoformat(r['report_datetime']).strftime('%Y-%m-%d %H:%M')
-                items.append(f"<li><a href=\"{r['filename']}\">{dt}</a> - Avg APM: {r['average_apm']}</li>")
-            return f"""
-            <div class="tag-group">
-                <h3>Tag: {tag}</h3>
-                <ul>{''.join(items)}</ul>
-            </div>"""
-
-        html_path = self.reports_dir / "index.html"
-        html_content = f"""
-        <!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>YALAPM Reports</title>
-            <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-            <style>
-                body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif; margin: 2em; background: #f4f4f9; color: #333; }}
-                h1, h2, h3 {{ color: #444; }}
-                .container {{ display: flex; flex-wrap: wrap; gap: 2em; }}
-                .reports-list {{ flex: 1; min-width: 350px; }}
-                .chart-container {{ flex: 2; min-width: 400px; background: #fff; padding: 1em; border-radius: 8px; box-shadow: 0 0 10px rgba(0,0,0,0.1); }}
-                ul {{ list-style-type: none; padding: 0; }} li {{ margin-bottom: 0.5em; padding: 0.5em; background: #fff; border-radius: 4px; }}
-                a {{ text-decoration: none; color: #007bff; }} a:hover {{ text-decoration: underline; }}
-                .tag-group {{ margin-bottom: 1.5em; border: 1px solid #ddd; padding: 1em; border-radius: 8px; background: #fafafa; }}
-                .chart-controls {{ margin-bottom: 1em; }}
-                .chart-controls label {{ font-weight: bold; margin-right: 10px; }}
-                .chart-controls select {{ padding: 5px; border-radius: 4px; border: 1px solid #ccc; }}
-            </style>
-        </head><body>
-            <h1>YALAPM Session Reports Dashboard</h1>
-            <div class="container">
-                <div class="reports-list">
-                    <h2>Saved Sessions</h2>
-                    {''.join(render_tag_section(tag, reports) for tag, reports in reports_by_tag.items())}
-                </div>
-                <div class="chart-container">
-                    <div class="chart-controls">
-                        <label for="tagFilter">Filter Chart by Tag:</label>
-                        <select id="tagFilter">
-                            {''.join(filter_options)}
-                        </select>
-                    </div>
-                    <h2>Historical APM Performance</h2><canvas id="apmChart"></canvas>
-                </div>
-            </div>
-            <script>
-                const reportsByTag = {json.dumps(reports_by_tag)};
-                const allReports = {json.dumps(all_data)};
-                let apmChart;
-
-                function updateChart(selectedTag) {{
-                    let sourceData;
-                    if (selectedTag === 'all') {{
-                        sourceData = allReports;
-                    }} else {{
-                        sourceData = reportsByTag[selectedTag] || [];
-                    }}
-
-                    // Sort data by date to ensure the line chart is chronological
-                    sourceData.sort((a, b) => new Date(a.report_datetime) - new Date(b.report_datetime));
-                    
-                    const labels = sourceData.map(r => new Date(r.report_datetime).toLocaleString());
-                    const avgApmData = sourceData.map(r => r.average_apm);
-                    const veApmData = sourceData.map(r => r.average_veapm);
-
-                    apmChart.data.labels = labels;
-                    apmChart.data.datasets[0].data = avgApmData;
-                    apmChart.data.datasets[1].data = veApmData;
-                    apmChart.update();
-                }}
-
-                document.addEventListener('DOMContentLoaded', () => {{
-                    const ctx = document.getElementById('apmChart').getContext('2d');
-                    apmChart = new Chart(ctx, {{
-                        type: 'line', 
-                        data: {{ 
-                            labels: [], // Initially empty
-                            datasets: [
-                                {{ label: 'Average APM', data: [], borderColor: 'rgba(75, 192, 192, 1)', tension: 0.1 }},
-                                {{ label: 'Average veAPM', data: [], borderColor: 'rgba(255, 99, 132, 1)', tension: 0.1 }} 
-                            ]
-                        }},
-                        options: {{ 
-                            responsive: true, 
-                            scales: {{ 
-                                x: {{ title: {{ display: true, text: 'Report Date' }} }}, 
-                                y: {{ title: {{ display: true, text: 'APM' }} }} 
-                            }} 
-                        }}
-                    }});
-
-                    // Initial chart load
-                    updateChart('all');
-
-                    // Add event listener for the filter
-                    document.getElementById('tagFilter').addEventListener('change', (event) => {{
-                        updateChart(event.target.value);
-                    }});
-                }});
-            </script>
-        </body></html>"""
+        filter_options += [_OPTION_FMT % (tag, tag) for tag in sorted(reports_by_tag)]
+
+        tag_sections = [
+            _TAG_FMT % (tag, ''.join([_LI_FMT % (r['filename'], label(r), r['average_apm']) for r in reports]))
+            for tag, reports in reports_by_tag.items()
+        ]
+
+        fields = {
+            "TAG_SECTIONS": ''.join(tag_sections),
+            "FILTER_OPTIONS": ''.join(filter_options),
+            "CHART_BY_TAG": json.dumps({tag: chart_series(reports) for tag, reports in reports_by_tag.items()}, separators=JSON_SEPARATORS),
+            "CHART_ALL": json.dumps(chart_series([r for reports in reports_by_tag.values() for r in reports]), separators=JSON_SEPARATORS),
+        }
+        # Odd slots of _HTML_PARTS hold marker names; report data is never re-scanned for markers
+        parts = _HTML_PARTS[:]
+        parts[1::2] = [fields[name] for name in _HTML_PARTS[1::2]]
+        html_content = "".join(parts)
         with open(html_path, 'w') as f: f.write(html_content)
+        self._html_signature = signature
+        self._html_dirty = False
         return html_path
 
 # --- Textual TUI ---
@@ -341,24 +534,38 @@ class APMDisplay(Static):
     def watch_value(self, value: int):
         self.update(f"{self.icon} {self.label:<16} [b]{value:>6,}[/b]")
 
+def _graph_columns(height, bar_chars):
+    """Every distinct bar column, top-down, indexed by bar height in fractional-glyph steps."""
+    levels = len(bar_chars) - 1
+    columns = [' ' * (height - 1 - full) + bar_chars[frac] + '█' * full
+               for full in range(height) for frac in range(levels)]
+    columns.append('█' * height)
+    return tuple(columns)
+
+@lru_cache(maxsize=4)
+def _sample_indices(width, hist_len):
+    """History index shown in each of `width` columns; only changes on resize or while history fills."""
+    return tuple(i * hist_len // width for i in range(width))
+
 class APMGraph(Static):
     history = reactive(list)
     MAX_BAR_HEIGHT = 8
+    BAR_CHARS = (' ', ' ', '▂', '▃', '▄', '▅', '▆', '▇', '█')
+    COLUMNS = _graph_columns(MAX_BAR_HEIGHT, BAR_CHARS)
     def watch_history(self, history: list):
         graph_width = self.size.width
         if not history or graph_width <= 0:
             self.update(""); return
-        max_apm = max(history) if history else 1
-        grid = [[' '] * graph_width for _ in range(self.MAX_BAR_HEIGHT)]
-        bar_chars = [' ', ' ', '▂', '▃', '▄', '▅', '▆', '▇', '█']
-        for i in range(graph_width):
-            idx = int(i * len(history) / graph_width)
-            bar_height = (history[idx] / max_apm) * self.MAX_BAR_HEIGHT if max_apm > 0 else 0
-            full_bars, fractional_part = int(bar_height), bar_height - int(bar_height)
-            for y in range(full_bars): grid[self.MAX_BAR_HEIGHT - 1 - y][i] = '█'
-            if full_bars < self.MAX_BAR_HEIGHT:
-                grid[self.MAX_BAR_HEIGHT - 1 - full_bars][i] = bar_chars[int(fractional_part * (len(bar_chars) - 1))]
-        self.update("\n".join("".join(row) for row in grid))
+        max_apm = max(history)
+        # Each column is one table lookup; the rows come from a single transpose
+        if max_apm > 0:
+            table = self.COLUMNS
+            steps = len(table) - 1
+            # Integer floor division gives the same step as the float scaling for APM counts
+            columns = [table[history[i] * steps // max_apm] for i in _sample_indices(graph_width, len(history))]
+        else:
+            columns = [self.COLUMNS[0]] * graph_width
+        self.update("\n".join(map("".join, zip(*columns))))
 
 class StartSessionScreen(ModalScreen):
     def compose(self) -> ComposeResult:
@@ -380,12 +587,12 @@ class StartSessionScreen(ModalScreen):
             self.dismiss((tag, veapm))
 
 class ReportItem(Static):
-    def __init__(self, report_data: dict) -> None:
+    def __init__(self, report_data: dict, date_label: str) -> None:
         super().__init__()
         self.report_data = report_data
+        self.date_label = date_label
     def compose(self) -> ComposeResult:
-        dt = datetime.fromisoformat(self.report_data['report_datetime']).strftime('%Y-%m-%d %H:%M')
-        info = f"{dt} - Avg APM: {self.report_data['average_apm']}"
+        info = f"{self.date_label} - Avg APM: {self.report_data['average_apm']}"
         with Horizontal(id="horizontal_item"):
             yield Label(info, classes="report_label")
             yield Button("Delete", variant="error", classes="delete_report")
@@ -419,10 +626,12 @@ class ReportManagerScreen(ModalScreen):
         for tag, reports in reports_by_tag.items():
             list_view.append(ListItem(TagHeader(tag), classes="tag_header_item"))
             for report in reports:
-                list_view.append(ListItem(ReportItem(report)))
+                list_view.append(ListItem(ReportItem(report, self.engine.report_date_label(report))))
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "close_manager":
+            # Deletions only mark the HTML stale; write it once for the whole visit
+            self.engine.flush_html()
             self.app.pop_screen()
             return
         
@@ -441,6 +650,11 @@ class ReportManagerScreen(ModalScreen):
             self.populate_list()
 
 class YalapmTUI(App):
+    GRAPH_REFRESH_TICKS = 3
+    _HINT_STOPPED = "💡 [b]Press 's' to START Session[/b]"
+    _HINT_RUNNING = "💡 [b]Press 'p' to PAUSE Session[/b]"
+    _HINT_PAUSED = "💡 [b]Press 's' to RESUME Session[/b]"
+    _HINTS = (_HINT_STOPPED, _HINT_PAUSED, _HINT_RUNNING)  # Indexed by engine state
     CSS = """
     Screen { background: $surface-darken-1; }
     #main_container { layout: grid; grid-size: 2; grid-gutter: 1; padding: 1; border: thick $primary-lighten-2; border-title-align: center; }
@@ -470,6 +684,8 @@ class YalapmTUI(App):
     def __init__(self, engine):
         super().__init__()
         self.engine = engine
+        self._last_state = None
+        self._tick_count = 0
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -481,34 +697,53 @@ class YalapmTUI(App):
             yield APMDisplay("Total Actions:", "🎯", id="total_actions")
             yield Static("", id="session_time")
             yield Static("", id="status")
-            yield Static("💡 [b]Press 's' to START Session[/b]", id="controls_hint")
+            yield Static(self._HINT_STOPPED, id="controls_hint")
             yield APMGraph(id="graph")
         yield Footer()
 
     def on_mount(self) -> None:
-        self.set_interval(1, self.update_display)
+        self._tick_timer = self.set_interval(1, self.update_display)
+        self.engine.on_state_change = self.on_engine_state_change
         self.query_one("#main_container").border_title = "YALAPM"
         self.query_one("#graph").border_title = "APM Trend (last 5 mins)"
+        # Widgets are static for the app's lifetime, so look them up once
+        self._stat_widgets = [(key, self.query_one(f"#{key}", APMDisplay)) for key in ["current_apm", "peak_apm", "average_apm", "average_veapm", "total_actions"]]
+        self._session_time_widget = self.query_one("#session_time")
+        self._status_widget = self.query_one("#status")
+        self._graph_widget = self.query_one(APMGraph)
+        self._hint_widget = self.query_one("#controls_hint")
+
+    def on_engine_state_change(self, state: int) -> None:
+        self._tick_timer.resume()
 
     def update_display(self) -> None:
-        stats = self.engine.get_stats()
-        for key in ["current_apm", "peak_apm", "average_apm", "average_veapm", "total_actions"]:
-            self.query_one(f"#{key}", APMDisplay).value = stats[key]
-        self.query_one("#session_time").update(f"⏱️ Session Time:   [b]{stats['session_time']}[/b]")
-        self.query_one("#status").update(f"   Status:         [b]{stats['status']}[/b]")
-        self.query_one(APMGraph).history = stats["apm_history"]
-        hint_widget = self.query_one("#controls_hint")
-        if self.engine.state == "STOPPED": hint_widget.update("💡 [b]Press 's' to START Session[/b]")
-        elif self.engine.state == "RUNNING": hint_widget.update("💡 [b]Press 'p' to PAUSE Session[/b]")
-        elif self.engine.state == "PAUSED": hint_widget.update("💡 [b]Press 's' to RESUME Session[/b]")
+        # Stopped or paused with the APM window drained, every tick would render the
+        # same frame; sleep until the engine changes state
+        state = self.engine.state
+        if state != STATE_RUNNING and state == self._last_state and not self.engine.action_buckets:
+            self._tick_timer.pause()
+            return
+        state_changed = state != self._last_state
+        self._last_state = state
+        stats = self.engine.get_counters()
+        for key, widget in self._stat_widgets:
+            widget.value = stats[key]
+        self._session_time_widget.update(f"⏱️ Session Time:   [b]{stats['session_time']}[/b]")
+        self._status_widget.update(f"   Status:         [b]{stats['status']}[/b]")
+        # The 5 minute trend barely moves per second; copy and redraw it every few ticks
+        self._tick_count += 1
+        if state_changed or self._tick_count % self.GRAPH_REFRESH_TICKS == 0:
+            self._graph_widget.history = self.engine.get_history()
+        # The hint only depends on the state
+        if state_changed: self._hint_widget.update(self._HINTS[state])
 
     def action_start_resume(self) -> None:
-        if self.engine.state == "STOPPED":
+        if self.engine.state == STATE_STOPPED:
             def start_session_callback(data: tuple):
                 tag, veapm = data
                 self.engine.start(tag, veapm)
             self.push_screen(StartSessionScreen(), start_session_callback)
-        elif self.engine.state == "PAUSED": self.engine.resume()
+        elif self.engine.state == STATE_PAUSED: self.engine.resume()
 
     def action_pause(self) -> None: self.engine.pause()
 
@@ -522,39 +757,36 @@ class YalapmTUI(App):
     def action_open_folder(self) -> None: self.engine.open_report_folder()
     
     def action_view_report(self) -> None:
+        self.engine.flush_html()
         report_path = self.engine.get_report_path()
-        if report_path.exists(): webbrowser.open_new_tab(report_path.as_uri())
+        if report_path.exists(): self.engine.open_report()
         else: self.notify("No report file exists yet. Stop a session first.", title="Info")
 
-    def action_quit(self) -> None:
-        report_path = self.engine.stop()
-        if report_path: webbrowser.open_new_tab(report_path.as_uri())
+    async def action_quit(self) -> None:
+        # Saving the session rewrites the HTML report; keep that off the UI thread.
+        # Stop ticking first so the worker is the only one draining the engine,
+        # and unhook the state-change callback so it can't touch the timer
+        self._tick_timer.stop()
+        self.engine.on_state_change = None
+        report_path = await asyncio.to_thread(self.engine.stop)
+        await asyncio.to_thread(self.engine.flush_html)
+        self.engine.stop_listeners()
+        if report_path: self.engine.open_report()
         self.exit()
 
 # --- Main Execution ---
 
-def check_permissions():
-    try:
-        m_test = mouse.Listener(on_click=lambda *args: None)
-        k_test = keyboard.Listener(on_press=lambda k: None)
-        m_test.start(); k_test.start()
-        time.sleep(0.1)
-        m_test.stop(); k_test.stop()
-        return True
-    except Exception:
-        return False
-
-
 def main():
     """Entry point for yalapm CLI."""
     print("🔍 Checking system compatibility...")
-    if not check_permissions():
+    engine = APMMonitorEngine()
+    # The listeners started here are the ones used for every session
+    if not engine.start_listeners():
         print("\n⚠️  Permission issue detected! Please run with sudo:\n   $ sudo yalapm\n")
         sys.exit(1)
     else:
         print("✅ Permissions look good!")
 
-    engine = APMMonitorEngine()
     app = YalapmTUI(engine)
     app.run()
 